@@ -1,11 +1,27 @@
 import asyncio
 import json
 import os
+import sqlite3
 import time
 import re
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 import base64
+from contextlib import contextmanager
 import aiohttp
+from yarl import URL
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 from hoshino import Service, priv, util
 from hoshino.typing import CQEvent, HoshinoBot
 from .config import (
@@ -39,9 +55,12 @@ sv = Service(
 # ============================================================================
 # 数据文件存放路径
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+# 订阅数据库: subs(gid, streamer) 订阅关系, live(streamer) 在线状态缓存
+DB_FILE = os.path.join(DATA_DIR, "subs.db")
+# 旧版JSON数据文件, 仅用于首次启动时迁移
 # 订阅关系文件: { "gid": ["streamer1", "streamer2"] }
 GROUP_SUBS_FILE = os.path.join(DATA_DIR, "group_subs.json")
-# 主播到群组的反向映射: { "streamer1": ["gid1", "gid2"] }
+# 主播到群组的反向映射: { "streamer1": ["gid1", "gid2"] }, 可由订阅关系推导, 迁移时直接删除
 STREAMER_SUBS_FILE = os.path.join(DATA_DIR, "streamer_subs.json")
 # 在线状态缓存: { "live": ["streamer1", "streamer3"] }
 LIVE_STATUS_FILE = os.path.join(DATA_DIR, "live_status.json")
@@ -55,20 +74,158 @@ def _load_json(file_path: str, default_val: Any) -> Any:
     if not os.path.exists(file_path):
         return default_val
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
+        with open(file_path, 'rb') as f:
+            return _json_loads(f.read())
+    except (ValueError, IOError):
         return default_val
 
 
-def _save_json(data: Any, file_path: str):
-    """保存数据到JSON文件"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+def _init_db(db_file: str) -> sqlite3.Connection:
+    """打开数据库并建表, 自动提交模式下每条语句即一次事务"""
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS subs(gid TEXT, streamer TEXT, PRIMARY KEY(gid, streamer))")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_streamer ON subs(streamer)")
+    conn.execute("CREATE TABLE IF NOT EXISTS live(streamer TEXT PRIMARY KEY)")
+    return conn
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """将多条语句包在同一事务中, 中途出错或进程崩溃时不会留下写了一半的数据"""
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _read_json(file_path: str) -> Any:
+    """读取JSON文件, 解析失败时直接抛出异常"""
+    with open(file_path, 'rb') as f:
+        return _json_loads(f.read())
 
 
+def _migrate_json(conn: sqlite3.Connection):
+    """将旧版JSON数据导入数据库, 导入后将旧文件重命名为 .bak"""
+    if not os.path.exists(GROUP_SUBS_FILE):
+        return
+    # 订阅文件损坏时不能按空数据处理, 否则改名后所有订阅都会丢失
+    try:
+        group_subs = _read_json(GROUP_SUBS_FILE)
+        rebuilt = False
+    except (ValueError, IOError) as e:
+        sv.logger.error(f"Twitch监控：读取旧版订阅文件 {GROUP_SUBS_FILE} 失败: {e}")
+        # 尝试由主播到群组的反向映射还原订阅关系
+        try:
+            streamer_subs = _read_json(STREAMER_SUBS_FILE)
+        except (ValueError, IOError) as e:
+            sv.logger.error(f"Twitch监控：读取旧版订阅文件 {STREAMER_SUBS_FILE} 失败，已跳过迁移，请修复后重启: {e}")
+            return
+        group_subs = {}
+        for streamer, gids in streamer_subs.items():
+            for gid in gids:
+                group_subs.setdefault(gid, []).append(streamer)
+        rebuilt = True
+    live_status = _load_json(LIVE_STATUS_FILE, {"live": []})
+    with _transaction(conn):
+        conn.executemany(
+            "INSERT OR IGNORE INTO subs(gid, streamer) VALUES (?, ?)",
+            [(gid, streamer) for gid, streamers in group_subs.items() for streamer in streamers]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO live(streamer) VALUES (?)",
+            [(streamer,) for streamer in live_status.get("live", [])]
+        )
+    for file_path in (GROUP_SUBS_FILE, LIVE_STATUS_FILE):
+        if os.path.exists(file_path):
+            os.replace(file_path, file_path + ".bak")
+    # 反向映射可由订阅关系推导, 仅在订阅关系文件正常导入时删除, 否则作为还原来源保留备份
+    if os.path.exists(STREAMER_SUBS_FILE):
+        if rebuilt:
+            os.replace(STREAMER_SUBS_FILE, STREAMER_SUBS_FILE + ".bak")
+        else:
+            os.remove(STREAMER_SUBS_FILE)
+    sv.logger.info(f"Twitch监控：已将旧版JSON订阅数据迁移至 {DB_FILE}")
+
+
+_db = _init_db(DB_FILE)
+_migrate_json(_db)
+
+
+def _load_state():
+    """启动时从数据库一次性载入订阅关系与在线状态, 主播到群组的反向映射只在内存中推导"""
+    group_subs: Dict[str, Set[str]] = {}
+    streamer_subs: Dict[str, Set[str]] = {}
+    for gid, streamer in _db.execute("SELECT gid, streamer FROM subs"):
+        group_subs.setdefault(gid, set()).add(streamer)
+        streamer_subs.setdefault(streamer, set()).add(gid)
+    live_status = {row[0] for row in _db.execute("SELECT streamer FROM live")}
+    return group_subs, streamer_subs, live_status
+
+
+# 内存中的订阅索引, 读操作直接查内存, 修改时同步写入数据库
+# 修改函数内部不会 await, 协程之间无需额外加锁
+_group_subs, _streamer_subs, _live_status = _load_state()
+
+
+def _add_sub(gid: str, streamer: str) -> bool:
+    """添加订阅, 已存在时返回False"""
+    if streamer in _group_subs.get(gid, ()):
+        return False
+    _db.execute("INSERT OR IGNORE INTO subs(gid, streamer) VALUES (?, ?)", (gid, streamer))
+    _group_subs.setdefault(gid, set()).add(streamer)
+    _streamer_subs.setdefault(streamer, set()).add(gid)
+    return True
+
+
+def _remove_sub(gid: str, streamer: str) -> bool:
+    """取消订阅, 不存在时返回False"""
+    if streamer not in _group_subs.get(gid, ()):
+        return False
+    _db.execute("DELETE FROM subs WHERE gid = ? AND streamer = ?", (gid, streamer))
+    _group_subs[gid].discard(streamer)
+    if not _group_subs[gid]:
+        del _group_subs[gid]
+    _streamer_subs[streamer].discard(gid)
+    if not _streamer_subs[streamer]:
+        del _streamer_subs[streamer]
+    return True
+
+
+def _set_live_status(live: Set[str]):
+    """更新在线状态缓存"""
+    with _transaction(_db):
+        _db.execute("DELETE FROM live")
+        _db.executemany("INSERT INTO live(streamer) VALUES (?)", [(streamer,) for streamer in live])
+    _live_status.clear()
+    _live_status.update(live)
+
+
+# 主播ID格式: 字母或数字开头, 4-25位字母/数字/下划线
+_STREAMER_ID_RE = re.compile(r"[a-zA-Z0-9][a-zA-Z0-9_]{3,24}")
+
 TWITCH_AUTH_URL = "https://id.twitch.tv/oauth2/token"
 TWITCH_API_BASE_URL = "https://api.twitch.tv/helix"
+# 推送通知用到的直播字段, 其余字段解析后直接丢弃
+_STREAM_FIELDS = ('user_login', 'user_name', 'title', 'game_name', 'thumbnail_url')
+
+
+async def _read_streams(response: aiohttp.ClientResponse) -> List[Dict[str, Any]]:
+    """
+    解析 /streams 返回的直播列表，只保留所需字段。
+    安装了ijson时边接收边解析，不必先缓冲整个响应体。
+    """
+    if ijson is not None:
+        return [
+            {key: item[key] for key in _STREAM_FIELDS if key in item}
+            async for item in ijson.items(response.content, 'data.item')
+        ]
+    data = await response.json(loads=_json_loads)
+    return [{key: item[key] for key in _STREAM_FIELDS if key in item} for item in data.get("data", [])]
 
 
 class TwitchAPIClient:
@@ -80,10 +237,15 @@ class TwitchAPIClient:
         self._access_token: Optional[str] = None
         self._token_expires_at: float = 0
         self._token_expiry_safety_margin: int = 120  # 提前2分钟刷新
+        self._token_lock = asyncio.Lock()
+        # 用户信息缓存: { login: (用户信息, 过期时间) }
+        self._user_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._user_cache_ttl: int = 3600
 
     async def _create_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
         return self._session
 
     async def close(self):
@@ -97,7 +259,7 @@ class TwitchAPIClient:
         try:
             async with session.post(TWITCH_AUTH_URL, params=params, proxy=self.proxy) as response:
                 response.raise_for_status()
-                data = await response.json()
+                data = await response.json(loads=_json_loads)
                 self._access_token = data["access_token"]
                 expires_in = data["expires_in"]
                 self._token_expires_at = time.time() + expires_in - self._token_expiry_safety_margin
@@ -106,64 +268,113 @@ class TwitchAPIClient:
             sv.logger.error(f"获取Twitch令牌失败: {e}")
             raise
 
+    def _token_expired(self) -> bool:
+        return self._access_token is None or time.time() >= self._token_expires_at
+
     async def _ensure_token_valid(self):
-        if self._access_token is None or time.time() >= self._token_expires_at:
-            await self._renew_token()
+        if not self._token_expired():
+            return
+        # 加锁后再次检查, 避免并发请求同时刷新令牌
+        async with self._token_lock:
+            if self._token_expired():
+                await self._renew_token()
+
+    async def _force_renew_token(self, rejected_token: Optional[str]):
+        """令牌被API拒绝时强制刷新, 若其他请求已刷新过则直接使用新令牌"""
+        async with self._token_lock:
+            if self._access_token == rejected_token:
+                await self._renew_token()
+
+    async def _fetch_streams_chunk(self, chunk: List[str]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            # 主播ID订阅时已校验为字母/数字/下划线, 无需URL编码, 直接拼接查询串
+            # https://dev.twitch.tv/docs/api/reference/#get-streams
+            url = URL(f"{TWITCH_API_BASE_URL}/streams?" + "&".join("user_login=" + login for login in chunk),
+                      encoded=True)
+            # 401时刷新令牌并仅重试当前分块一次
+            for attempt in range(2):
+                await self._ensure_token_valid()
+                session = await self._create_session()
+                access_token = self._access_token
+                headers = {"Client-ID": self.app_id, "Authorization": f"Bearer {access_token}"}
+                async with session.get(url, headers=headers, proxy=self.proxy) as response:
+                    if response.status == 401:
+                        if attempt == 0:
+                            sv.logger.warning("Twitch API返回401，将强制刷新令牌后重试...")
+                            await self._force_renew_token(access_token)
+                            continue
+                        sv.logger.warning("Twitch API刷新令牌后仍返回401，将在下一周期重试。")
+                        return None
+                    response.raise_for_status()
+                    return await _read_streams(response)
+        except aiohttp.ClientError as e:
+            sv.logger.error(f"调用 Twitch API '/streams' 失败: {e}")
+            return None
+        except Exception as e:
+            sv.logger.error(f"处理Twitch API请求时发生未知错误: {e}")
+            return None
 
     async def get_streams(self, user_logins: List[str]) -> Optional[List[Dict[str, Any]]]:
         if not user_logins:
             return []
 
-        # Twitch API一次最多查询100个用户
+        # Twitch API一次最多查询100个用户, 分块后并发请求
         chunk_size = 100
-        all_streams_data = []
+        chunks = [user_logins[i:i + chunk_size] for i in range(0, len(user_logins), chunk_size)]
+        results = await asyncio.gather(*(self._fetch_streams_chunk(chunk) for chunk in chunks))
 
-        for i in range(0, len(user_logins), chunk_size):
-            chunk = user_logins[i:i + chunk_size]
-            try:
-                await self._ensure_token_valid()
-                session = await self._create_session()
-                headers = {"Client-ID": self.app_id, "Authorization": f"Bearer {self._access_token}"}
-                params = [("user_login", login) for login in chunk]
-                # https://dev.twitch.tv/docs/api/reference/#get-streams
-                async with session.get(f"{TWITCH_API_BASE_URL}/streams", headers=headers, params=params,
-                                       proxy=self.proxy) as response:
-                    if response.status == 401:
-                        sv.logger.warning("Twitch API返回401，将强制刷新令牌后重试...")
-                        await self._renew_token()
-                        return None  # 等待下一个周期重试
-                    response.raise_for_status()
-                    data = await response.json()
-                    all_streams_data.extend(data.get("data", []))
-            except aiohttp.ClientError as e:
-                sv.logger.error(f"调用 Twitch API '/streams' 失败: {e}")
-                return None
-            except Exception as e:
-                sv.logger.error(f"处理Twitch API请求时发生未知错误: {e}")
+        all_streams_data = []
+        for streams_data in results:
+            if streams_data is None:
                 return None
+            all_streams_data.extend(streams_data)
         return all_streams_data
 
     async def get_users(self, user_logins: List[str]) -> Optional[List[Dict[str, Any]]]:
         """
         根据登录名获取用户信息，用于验证用户是否存在。
+        查询过的用户会缓存一段时间，命中缓存的登录名不再请求API。
         """
         if not user_logins:
             return []
+
+        now = time.time()
+        cached_users = []
+        uncached_logins = []
+        for login in user_logins:
+            cached = self._user_cache.get(login.lower())
+            if cached and cached[1] > now:
+                cached_users.append(cached[0])
+            else:
+                self._user_cache.pop(login.lower(), None)
+                uncached_logins.append(login)
+        if not uncached_logins:
+            return cached_users
+
         try:
             await self._ensure_token_valid()
             session = await self._create_session()
-            headers = {"Client-ID": self.app_id, "Authorization": f"Bearer {self._access_token}"}
-            params = [("login", login) for login in user_logins]
+            access_token = self._access_token
+            headers = {"Client-ID": self.app_id, "Authorization": f"Bearer {access_token}"}
+            params = [("login", login) for login in uncached_logins]
             # https://dev.twitch.tv/docs/api/reference/#get-users
             async with session.get(f"{TWITCH_API_BASE_URL}/users", headers=headers, params=params,
                                    proxy=self.proxy) as response:
                 if response.status == 401:
                     sv.logger.warning("Twitch API (users) 返回401，将强制刷新令牌后重试...")
-                    await self._renew_token()
+                    await self._force_renew_token(access_token)
                     return None  # 等待下次重试
                 response.raise_for_status()
-                data = await response.json()
-                return data.get("data", [])
+                data = await response.json(loads=_json_loads)
+                users = data.get("data", [])
+                now = time.time()
+                # 写入前清理过期项, 避免查询过的用户一直留在内存中
+                for login in [login for login, (_, expires_at) in self._user_cache.items() if expires_at <= now]:
+                    del self._user_cache[login]
+                expires_at = now + self._user_cache_ttl
+                for user in users:
+                    self._user_cache[user['login'].lower()] = (user, expires_at)
+                return cached_users + users
         except aiohttp.ClientError as e:
             sv.logger.error(f"调用 Twitch API '/users' 失败: {e}")
             return None
@@ -184,14 +395,11 @@ async def add_twitch_sub(bot: HoshinoBot, ev: CQEvent):
     gid = str(ev.group_id)
     streamer_id = ev.message.extract_plain_text().strip().lower()
 
-    if not re.fullmatch(r"^[a-zA-Z0-9][a-zA-Z0-9_]{3,24}$", streamer_id):
+    if not _STREAMER_ID_RE.fullmatch(streamer_id):
         await bot.send(ev, "请输入有效的 Twitch 主播ID！")
         return
 
-    group_subs = _load_json(GROUP_SUBS_FILE, {})
-    streamer_subs = _load_json(STREAMER_SUBS_FILE, {})
-
-    if streamer_id in group_subs.get(gid, []):
+    if streamer_id in _group_subs.get(gid, ()):
         await bot.send(ev, f"本群已经订阅了主播: {streamer_id}")
         return
     # --- 验证逻辑 ---
@@ -216,11 +424,9 @@ async def add_twitch_sub(bot: HoshinoBot, ev: CQEvent):
         return
 
     # 更新订阅关系
-    group_subs.setdefault(gid, []).append(actual_id)
-    streamer_subs.setdefault(actual_id, []).append(gid)
-
-    _save_json(group_subs, GROUP_SUBS_FILE)
-    _save_json(streamer_subs, STREAMER_SUBS_FILE)
+    if not _add_sub(gid, actual_id):
+        await bot.send(ev, f"本群已经订阅了主播: {actual_id}")
+        return
 
     await bot.send(ev, f"✅ 订阅成功！\n将接收 {actual_display_name} ({actual_id}) 的开播通知。")
 
@@ -234,33 +440,18 @@ async def remove_twitch_sub(bot: HoshinoBot, ev: CQEvent):
         await bot.send(ev, "请输入要取关的主播ID。")
         return
 
-    group_subs = _load_json(GROUP_SUBS_FILE, {})
-    streamer_subs = _load_json(STREAMER_SUBS_FILE, {})
-
-    if streamer_id not in group_subs.get(gid, []):
+    # 更新订阅关系
+    if not _remove_sub(gid, streamer_id):
         await bot.send(ev, f"本群没有订阅主播: {streamer_id}")
         return
 
-    # 更新订阅关系
-    group_subs[gid].remove(streamer_id)
-    if not group_subs[gid]:
-        del group_subs[gid]
-
-    streamer_subs[streamer_id].remove(gid)
-    if not streamer_subs[streamer_id]:
-        del streamer_subs[streamer_id]
-
-    _save_json(group_subs, GROUP_SUBS_FILE)
-    _save_json(streamer_subs, STREAMER_SUBS_FILE)
-
     await bot.send(ev, f"成功为本群取消对 {streamer_id} 的订阅。")
 
 
 @sv.on_fullmatch(('twitch订阅列表', '查看twitch订阅'))
 async def list_twitch_subs(bot: HoshinoBot, ev: CQEvent):
     gid = str(ev.group_id)
-    group_subs = _load_json(GROUP_SUBS_FILE, {})
-    subs = group_subs.get(gid, [])
+    subs = sorted(_group_subs.get(gid, ()))
 
     if not subs:
         await bot.send(ev, "本群还没有任何 Twitch 订阅。")
@@ -273,6 +464,24 @@ async def list_twitch_subs(bot: HoshinoBot, ev: CQEvent):
 # ============================================================================
 # 定时检查任务
 # ============================================================================
+# 封面图缓存: { thumbnail_url: (CQ码字符串, 过期时间) }
+_thumb_cache: Dict[str, Tuple[str, float]] = {}
+# 主播下播一个周期后再开播才会再次获取封面图, 两次获取至少相隔两个检查周期,
+# 有效期需长于此才能在短时间内重新开播时命中缓存
+_THUMB_CACHE_TTL = 3 * TWITCH_CHECK_INTERVAL * 60
+_THUMB_CACHE_MAX_SIZE = 256
+
+
+def _cache_thumbnail(thumbnail_url: str, cq_text: str):
+    """写入封面图缓存, 同时清理过期项, 仍超出容量则淘汰最早写入的一项"""
+    now = time.time()
+    for url in [url for url, (_, expires_at) in _thumb_cache.items() if expires_at <= now]:
+        del _thumb_cache[url]
+    if len(_thumb_cache) >= _THUMB_CACHE_MAX_SIZE:
+        del _thumb_cache[next(iter(_thumb_cache))]
+    _thumb_cache[thumbnail_url] = (cq_text, now + _THUMB_CACHE_TTL)
+
+
 async def _get_thumbnail_as_cq_image_text(
         session: aiohttp.ClientSession,
         stream_data: Dict[str, Any]
@@ -285,13 +494,21 @@ async def _get_thumbnail_as_cq_image_text(
     if not thumbnail_url:
         return ""
 
+    cached = _thumb_cache.get(thumbnail_url)
+    if cached:
+        if cached[1] > time.time():
+            return cached[0]
+        del _thumb_cache[thumbnail_url]
+
     try:
         # 使用传入的 session 和配置的代理来下载图片
         async with session.get(thumbnail_url, proxy=TWITCH_PROXY_URL, timeout=10) as response:
             if response.status == 200:
                 image_bytes = await response.read()
-                base64_str = base64.b64encode(image_bytes).decode('utf-8')
-                return f"[CQ:image,file=base64://{base64_str}]"
+                # base64 结果是纯ASCII, 直接拼接字节后一次性解码
+                cq_text = (b"[CQ:image,file=base64://" + base64.b64encode(image_bytes) + b"]").decode('ascii')
+                _cache_thumbnail(thumbnail_url, cq_text)
+                return cq_text
             else:
                 sv.logger.warning(
                     f"下载直播封面图失败 ({stream_data.get('user_login', 'N/A')}), HTTP状态码: {response.status}")
@@ -301,12 +518,43 @@ async def _get_thumbnail_as_cq_image_text(
         return ""
 
 
+async def _no_thumbnail(session: aiohttp.ClientSession, stream_data: Dict[str, Any]) -> str:
+    """未启用封面图时使用, 直接返回空字符串"""
+    return ""
+
+
+# 根据配置提前选定标题过滤与封面图获取方式, 避免在推送循环中逐条判断
+_filter_title = (lambda title: title) if TWITCH_DISABLE_SENSITIVE_FILTER else util.filt_message
+_get_thumbnail = _get_thumbnail_as_cq_image_text if TWITCH_SEND_IMAGE else _no_thumbnail
+
+# 同时推送开播通知的最大群数
+_SEND_CONCURRENCY = 5
+
+
+async def _send_group_notice(
+        bot: HoshinoBot,
+        semaphore: asyncio.Semaphore,
+        gid: str,
+        streamer_login: str,
+        message: str
+):
+    """向单个群推送开播通知, 通过信号量限制并发, 推送失败只记录日志"""
+    async with semaphore:
+        try:
+            await bot.send_group_msg(group_id=int(gid), message=message)
+            sv.logger.info(f"成功向群 {gid} 推送了 {streamer_login} 的开播通知。")
+        except Exception as e:
+            sv.logger.error(f"向群 {gid} 推送失败: {e}")
+        await asyncio.sleep(0.2)  # 简单的防风控
+
+
 @sv.scheduled_job('interval', minutes=TWITCH_CHECK_INTERVAL)
 async def twitch_monitor_task():
-    bot = sv.bot
-    streamer_subs = _load_json(STREAMER_SUBS_FILE, {})
-    if not streamer_subs:
+    # 没有任何订阅时直接跳过, 不请求API
+    if not _streamer_subs:
         return
+    bot = sv.bot
+    streamer_subs = _streamer_subs
 
     all_streamers_to_check = list(streamer_subs.keys())
     sv.logger.info(f"Twitch监控：开始检查 {len(all_streamers_to_check)} 位主播的状态...")
@@ -316,42 +564,52 @@ async def twitch_monitor_task():
         sv.logger.warning("Twitch监控：获取直播列表失败，将在下一周期重试。")
         return
 
-    live_status = _load_json(LIVE_STATUS_FILE, {"live": []})
-    previously_online = set(live_status.get("live", []))
-    currently_online = {stream['user_login'].lower() for stream in streams_data}
-    newly_started = currently_online - previously_online
+    # 一次遍历同时得到当前在线集合与新开播的直播
+    previously_online = _live_status
+    currently_online: Set[str] = set()
+    newly_started: List[Dict[str, Any]] = []
+    for stream in streams_data:
+        # Twitch返回的 user_login 即小写的规范登录名, 无需再转换
+        streamer_login = stream['user_login']
+        currently_online.add(streamer_login)
+        if streamer_login not in previously_online:
+            newly_started.append(stream)
 
     if not newly_started:
         sv.logger.info("Twitch监控：没有新开播的主播。")
     else:
-        sv.logger.info(f"Twitch监控：检测到 {len(newly_started)} 位新开播的主播: {', '.join(newly_started)}")
+        sv.logger.info(
+            f"Twitch监控：检测到 {len(newly_started)} 位新开播的主播: "
+            f"{', '.join(stream['user_login'] for stream in newly_started)}")
         session = await twitch_client._create_session()
-
-        for stream in streams_data:
-            streamer_login = stream['user_login'].lower()
-            if streamer_login in newly_started:
-                # 构建基础文本消息
-                final_msg = (
-                    f"【Twitch 开播提醒】🎉\n"
-                    f"主播: {stream['user_name']} ({stream['user_login']})\n"
-                    f"标题: {stream['title'] if TWITCH_DISABLE_SENSITIVE_FILTER else util.filt_message(stream['title'])}\n"
-                    f"游戏: {stream['game_name']}\n"
-                    # f"链接: https://www.twitch.tv/{streamer_login}"
-                )
-
-                # 根据配置决定是否获取图片
-                if TWITCH_SEND_IMAGE:
-                    final_msg += await _get_thumbnail_as_cq_image_text(session, stream)
-
-                # 向所有订阅了该主播的群组发送通知
-                subscribed_groups = streamer_subs.get(streamer_login, [])
-                for gid in subscribed_groups:
-                    try:
-                        await bot.send_group_msg(group_id=int(gid), message=final_msg)
-                        sv.logger.info(f"成功向群 {gid} 推送了 {streamer_login} 的开播通知。")
-                        await asyncio.sleep(1)  # 简单的防风控
-                    except Exception as e:
-                        sv.logger.error(f"向群 {gid} 推送失败: {e}")
-
-    # 更新在线状态缓存
-    _save_json({"live": list(currently_online)}, LIVE_STATUS_FILE)
\ No newline at end of file
+        semaphore = asyncio.Semaphore(_SEND_CONCURRENCY)
+
+        # 预先并发下载所有新开播主播的封面图
+        thumb_tasks: Dict[str, asyncio.Task] = {
+            stream['user_login']: asyncio.create_task(_get_thumbnail(session, stream))
+            for stream in newly_started
+        }
+
+        for stream in newly_started:
+            streamer_login = stream['user_login']
+            # 构建基础文本消息
+            final_msg = (
+                f"【Twitch 开播提醒】🎉\n"
+                f"主播: {stream['user_name']} ({stream['user_login']})\n"
+                f"标题: {_filter_title(stream['title'])}\n"
+                f"游戏: {stream['game_name']}\n"
+                # f"链接: https://www.twitch.tv/{streamer_login}"
+            )
+
+            # 未启用封面图时为空字符串
+            final_msg += await thumb_tasks[streamer_login]
+
+            # 向所有订阅了该主播的群组发送通知
+            subscribed_groups = list(streamer_subs.get(streamer_login, ()))
+            await asyncio.gather(
+                *(_send_group_notice(bot, semaphore, gid, streamer_login, final_msg) for gid in subscribed_groups)
+            )
+
+    # 在线状态有变化时才更新缓存
+    if currently_online != previously_online:
+        _set_live_status(currently_online)
\ No newline at end of file